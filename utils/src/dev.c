@@ -9,6 +9,7 @@
 #include <stdbool.h>
 
 #include "sparse.h"
+#include "util.h"
 #include "dev.h"
 
 int device_size(char *path, int fd,
@@ -78,28 +79,46 @@ int device_size(char *path, int fd,
 	return 0;
 }
 
-float size_flt(u64 nr, unsigned size)
+static char *size_suffixes[] = {
+	"B", "KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB",
+};
+
+/*
+ * Return the index of the largest power of 1024 unit that doesn't
+ * exceed the byte count.  Using the bit length avoids repeatedly
+ * dividing floats to find the unit.  The largest u64 has a bit length
+ * of 64 so the suffix table always covers the returned index.
+ *
+ * size_flt() divides the count after it's rounded to a float, which
+ * can round up to the next unit's boundary (2^40 - 4096 is 2^40 as a
+ * float).  We move up to that unit so that we print 1.00TB instead of
+ * 1024.00GB.
+ *
+ * Callers pass the product of a count and a size, which has to fit in
+ * a u64.
+ */
+static int size_unit(u64 bytes)
 {
-	float x = (float)nr * (float)size;
+	int unit;
+
+	build_assert(array_size(size_suffixes) > (64 - 1) / 10);
 
-	while (x >= 1024)
-		x /= 1024;
+	unit = bytes ? (flsll(bytes) - 1) / 10 : 0;
+	if (10 * (unit + 1) < 64 &&
+	    (float)bytes >= (float)(1ULL << (10 * (unit + 1))))
+		unit++;
 
-	return x;
+	return unit;
 }
 
-char *size_str(u64 nr, unsigned size)
+float size_flt(u64 nr, unsigned size)
 {
-	float x = (float)nr * (float)size;
-	static char *suffixes[] = {
-		"B", "KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB",
-	};
-	int i = 0;
-
-	while (x >= 1024) {
-		x /= 1024;
-		i++;
-	}
+	u64 bytes = nr * size;
+
+	return (float)bytes / (float)(1ULL << (10 * size_unit(bytes)));
+}
 
-	return suffixes[i];
+char *size_str(u64 nr, unsigned size)
+{
+	return size_suffixes[size_unit(nr * size)];
 }
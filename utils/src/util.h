@@ -4,7 +4,6 @@
 #include <unistd.h>
 #include <stdlib.h>
 #include <string.h>
-#include <math.h>
 
 #include "sparse.h"
 
@@ -82,10 +81,7 @@ do {				\
 	(_x == 0 ? 0 : 64 - __builtin_clzll(_x));	\
 })
 
-#define ilog2(x)					\
-({							\
-	((unsigned long)log2l((long double)x));		\
-})
+#define ilog2(x) ((unsigned long)(flsll(x) - 1))
 
 #define emit_get_unaligned_le(nr)			\
 static inline __u##nr get_unaligned_le##nr(void *buf)	\